@@ -6,21 +6,164 @@
 """
 
 import os
+import re
 import sys
 import io
+import gzip
 import math
+import time
+import hashlib
+import functools
+import asyncio
+import aiohttp
+import numpy as np
+import orjson
 import requests
-from PIL import Image
-from playwright.sync_api import sync_playwright
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter, Retry
+from PIL import Image, UnidentifiedImageError
+from playwright.async_api import async_playwright
+
+# CDN이 돌려주는 비정상적으로 큰 이미지로부터 방어 (기본값은 178메가픽셀)
+Image.MAX_IMAGE_PIXELS = 40_000_000
 
 # UTF-8 출력 설정
 sys.stdout.reconfigure(encoding='utf-8')
 
+__all__ = [
+    "crawl_latest_posts",
+    "crawl_post_detail",
+    "crawl_and_send_new_posts",
+    "send_slack",
+    "load_last_post",
+    "save_last_post",
+    "create_image_collage",
+    "download_image",
+    "upload_image_to_host",
+]
+
 # 설정
 CHANNEL_ID = "_FNHuG"
 TARGET_URL = f"https://pf.kakao.com/{CHANNEL_ID}/posts"
 WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
+# 봇 토큰이 있으면 이미지를 Slack 파일 API로 직접 업로드 (catbox.moe 의존 제거)
+SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
 HISTORY_FILE = "last_post.txt"
+ETAG_FILE = "last_etag.txt"
+IMAGE_CACHE_DIR = "cache"
+IMAGE_CACHE_TTL = 7 * 24 * 3600  # 7일 (주간 메뉴 이미지 재사용 주기)
+MAX_IMAGE_BYTES = 20 * 1024 * 1024  # 인코딩 기준 20MB 초과 응답 거부
+MAX_PARALLEL_PAGES = 3  # 상세 페이지 동시 크롤링 수
+MAX_PARALLEL_SENDS = 3  # Slack 동시 전송 수 (웹훅 초당 1건 제한 고려)
+
+# 크롤러는 DOM 텍스트와 img.src 속성만 읽으므로 실제 리소스 바이트는 불필요
+BLOCKED_RESOURCE_TYPES = ("image", "font", "stylesheet", "media")
+# 크롤링에 불필요한 서드파티 분석/광고 호스트
+BLOCKED_HOSTS = ("google-analytics.com", "googletagmanager.com",
+                 "doubleclick.net")
+
+# CI/컨테이너 환경에서 Chromium 프로세스를 가볍게 유지
+BROWSER_ARGS = ["--disable-dev-shm-usage", "--no-sandbox", "--disable-gpu"]
+# 실행 간 DNS 캐시/HSTS/TLS 세션 티켓을 보존하는 영속 프로필 디렉터리
+PROFILE_DIR = ".pw-profile"
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+              "AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/120.0.0.0 Safari/537.36")
+
+# 상세 페이지 추출 JS (제목/본문/메뉴/이미지를 한 번에 수집)
+POST_DETAIL_JS = """() => {
+    // 제외할 키워드 (제목이 아닌 UI 요소들) - 단일 정규식으로 한 번에 검사
+    const excludeRe = /QR|프로필|댓글|소식|채널홈|채널|폰으로|접속해보세요|고정됨|공유하기|좋아요|카카오톡|더보기|주식회사|공식채널/;
+    const menuExcludeRe = /채널|댓글|접속|폰으로/;
+
+    let title = '';
+    let content = '';
+    const menu_names = [];
+    const seenNames = new Set();
+    const image_urls = [];
+    const seenUrls = new Set();
+
+    // strong(제목) / p(메뉴) / img(이미지)를 단일 DOM 순회로 수집
+    const nodes = document.querySelectorAll('strong, p, img[alt="이미지"]');
+    for (const node of nodes) {
+        const tag = node.tagName;
+        if (tag === 'STRONG') {
+            // 제외 키워드 없는 첫 번째 strong이 제목
+            if (!title) {
+                const text = node.innerText.trim();
+                if (text && text.length > 1 && !excludeRe.test(text)) {
+                    title = text;
+                }
+            }
+        } else if (tag === 'P') {
+            // 짧은 텍스트만 메뉴 이름으로 인정 (Set으로 O(1) 중복 체크)
+            const text = node.innerText.trim();
+            if (text && text.length >= 1 && text.length <= 15 &&
+                !menuExcludeRe.test(text) && !seenNames.has(text)) {
+                seenNames.add(text);
+                menu_names.push(text);
+            }
+        } else {
+            // http -> https 정규화는 추출 시점에 한 번만
+            let src = node.src;
+            if (src && src.startsWith('http://')) {
+                src = 'https://' + src.slice(7);
+            }
+            if (src && !seenUrls.has(src)) {
+                seenUrls.add(src);
+                image_urls.push(src);
+            }
+        }
+    }
+
+    // 본문 가져오기 (desc_card 클래스)
+    const descCard = document.querySelector('.desc_card');
+    if (descCard) {
+        content = descCard.innerText.trim();
+    }
+
+    return { title, content, menu_names, image_urls };
+}"""
+
+# 목록 페이지 추출 JS (게시글 링크를 한 번에 수집)
+POST_LIST_JS = """(channelId) => {
+    return Array.from(document.querySelectorAll(`a[href^="/${channelId}/"]`)).map(a => {
+        // post_id 추출 (예: /_FNHuG/111531719 -> 111531719)
+        const parts = a.getAttribute('href').split('/');
+        const id = parts.length >= 3 ? parts[2] : '';
+        if (!/^\\d+$/.test(id)) return null;
+
+        const strong = a.querySelector('strong');
+        return {
+            id,
+            title: strong ? strong.innerText.trim() : '제목 없음',
+            is_pinned: (a.parentElement?.innerText || '').includes('고정됨')
+        };
+    }).filter(Boolean);
+}"""
+
+# 컨텍스트 초기화 시 한 번만 파싱되도록 헬퍼로 등록
+EXTRACT_HELPERS_JS = (
+    "window.__extractPost = " + POST_DETAIL_JS + ";\n"
+    "window.__extractPosts = " + POST_LIST_JS + ";"
+)
+
+# 콜라주 썸네일 리샘플링 필터
+# draft()로 이미 축소 로드된 이미지에는 BICUBIC이면 충분 (LANCZOS 대비 ~2배 저렴)
+# 150px 썸네일에서 아티팩트가 보이면 LANCZOS로 되돌릴 것
+COLLAGE_FILTER = Image.Resampling.BICUBIC
+
+# 커넥션 풀링 세션 (호스트당 TCP/TLS 핸드셰이크 1회로 절약)
+# Kakao CDN / catbox / Slack 웹훅 요청 전부가 이 세션을 공유한다
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3,
+                      status_forcelist=[429, 502, 503, 504],
+                      allowed_methods=["GET", "POST"]),
+))
+DEFAULT_TIMEOUT = 10  # 초
 
 
 def load_last_post():
@@ -33,54 +176,199 @@ def load_last_post():
 
 
 def save_last_post(post_id):
-    """새 게시글 ID 저장"""
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
+    """새 게시글 ID 저장 (원자적 쓰기 - 중단 시에도 파일 손상 방지)"""
+    tmp_file = HISTORY_FILE + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
         f.write(post_id)
+    os.replace(tmp_file, HISTORY_FILE)
+
+
+def load_last_etag():
+    """목록 페이지의 마지막 ETag 로드"""
+    if not os.path.exists(ETAG_FILE):
+        return None
+    with open(ETAG_FILE, "r", encoding="utf-8") as f:
+        content = f.read().strip()
+        return content if content else None
+
+
+def save_last_etag(etag):
+    """목록 페이지 ETag 저장 (원자적 쓰기)"""
+    tmp_file = ETAG_FILE + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(etag)
+    os.replace(tmp_file, ETAG_FILE)
+
+
+# 정적 HTML에서 게시글 ID를 긁는 프리체크용 패턴
+_POST_HREF_RE = re.compile(rf'href="/{CHANNEL_ID}/(\d+)"')
+
+# 메뉴 게시글 제목 패턴 - 이 경우만 이미지/메뉴 목록을 위해 상세 크롤링
+MENU_TITLE_RE = re.compile(r"오늘의 메뉴|금주 메뉴|메뉴|식단")
+
+
+def precheck_listing():
+    """조건부 GET 한 번으로 목록 변경 여부와 게시글 ID를 함께 확인
+
+    (unchanged, ids, new_etag)를 반환한다. 304면 unchanged=True로
+    Playwright 기동 없이 빠르게 종료할 수 있고, 200이면 같은 응답
+    본문에서 게시글 ID까지 정규식으로 긁는다 (JS 렌더링 전이라 앵커가
+    없으면 빈 리스트 - Playwright 경로로 폴백). 네트워크 오류 시에는
+    (False, [], None)으로 전체 크롤링 진행.
+
+    new_etag는 여기서 저장하지 않는다 - 알림 전송 전에 저장하면 실행이
+    중간에 실패했을 때 다음 실행이 304로 건너뛰어 알림이 유실된다.
+    호출자가 전송을 마친 뒤 save_last_etag로 저장할 것.
+    """
+    etag = load_last_etag()
+    headers = {"User-Agent": USER_AGENT}
+    if etag:
+        headers["If-None-Match"] = etag
+
+    try:
+        response = _SESSION.get(TARGET_URL, headers=headers, timeout=5)
+    except Exception:
+        return False, [], None
+
+    if response.status_code == 304:
+        return True, [], None
+    if response.status_code != 200:
+        return False, [], None
 
+    return (False, _POST_HREF_RE.findall(response.text),
+            response.headers.get("ETag"))
 
-def download_image(url):
-    """URL에서 이미지 다운로드"""
+
+@functools.lru_cache(maxsize=64)
+def _fetch_image_bytes(url):
+    """인코딩된 이미지 바이트 가져오기 (메모리 LRU + 7일 디스크 캐시)
+
+    주간 메뉴 그래픽처럼 같은 CDN URL이 여러 게시글에 반복 등장하는
+    경우 재다운로드를 피한다. 실패는 예외로 전파해 lru_cache에
+    기억되지 않게 한다 - 일시적 CDN 오류는 다음 호출에서 재시도된다.
+    """
+    cache_path = os.path.join(
+        IMAGE_CACHE_DIR, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".img")
+
+    try:
+        if (os.path.exists(cache_path) and
+                time.time() - os.path.getmtime(cache_path) < IMAGE_CACHE_TTL):
+            with open(cache_path, "rb") as f:
+                return f.read()
+    except OSError:
+        pass
+
+    headers = {"User-Agent": "Mozilla/5.0"}
+    response = _SESSION.get(url, headers=headers, timeout=DEFAULT_TIMEOUT,
+                            stream=True)
+    response.raise_for_status()
+
+    # 본문을 읽기 전에 크기 초과 응답 거부
+    content_length = int(response.headers.get("Content-Length", 0))
+    if content_length > MAX_IMAGE_BYTES:
+        response.close()
+        raise ValueError(f"이미지 크기 초과: {content_length} bytes ({url})")
+
+    data = response.content
     try:
-        # http -> https 변환
-        if url.startswith("http://"):
-            url = url.replace("http://", "https://")
-
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            return Image.open(io.BytesIO(response.content))
+        os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # 캐시 실패는 치명적이지 않음
+
+    return data
+
+
+def download_image(url, draft_size=None):
+    """URL에서 이미지 다운로드 (URL 기준 캐시)
+
+    draft_size를 주면 JPEG는 디코딩 단계에서 1/2, 1/4, 1/8 해상도로
+    축소 로드되어 (libjpeg draft) 전체 해상도 디코딩을 건너뛴다.
+    """
+    try:
+        data = _fetch_image_bytes(url)
+        if data:
+            img = Image.open(io.BytesIO(data))
+            if draft_size:
+                # PNG 등 draft 미지원 포맷에서는 no-op
+                img.draft('RGB', draft_size)
+            img.load()
+            return img
+    except (Image.DecompressionBombError, UnidentifiedImageError) as e:
+        print(f"    이미지 디코딩 거부: {e}")
     except Exception as e:
         print(f"    이미지 다운로드 실패: {e}")
     return None
 
 
+def _prepare_thumbnail(img, thumb_size):
+    """RGB 변환 + 썸네일 크기로 리사이즈 (2단계 축소)"""
+    # RGB로 통일 - 그레이스케일(L)/CMYK 등은 NumPy 캔버스에 (h, w, 3)으로
+    # 브로드캐스트되지 않으므로 모든 비-RGB 모드를 변환
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    # draft가 못 줄인 큰 이미지는 BOX 필터로 목표의 2배 크기까지 거칠게 축소
+    # (BOX는 출력 픽셀당 1-tap 평균이라 대부분의 축소를 싸게 흡수)
+    scale = min(img.width, img.height) / (thumb_size * 2)
+    if scale > 2:
+        box = (int(img.width / scale), int(img.height / scale))
+        img = img.resize(box, Image.Resampling.BOX)
+
+    img.thumbnail((thumb_size, thumb_size), COLLAGE_FILTER)
+    return img
+
+
+def _collage_single_row(images, thumb_size):
+    """3~4개 이미지(실제 게시글의 대부분) 전용 단일 행 고속 경로
+
+    행이 하나뿐이라 그리드 계산 없이 타일을 순서대로 슬라이스 복사한다.
+    """
+    canvas = np.full((thumb_size, len(images) * thumb_size, 3), 255,
+                     dtype=np.uint8)
+
+    for i, img in enumerate(images):
+        arr = np.asarray(img)
+        # 이미지 중앙 정렬
+        x = i * thumb_size + (thumb_size - arr.shape[1]) // 2
+        y = (thumb_size - arr.shape[0]) // 2
+        canvas[y:y + arr.shape[0], x:x + arr.shape[1]] = arr
+
+    return Image.fromarray(canvas, 'RGB')
+
+
 def create_image_collage(image_urls, thumb_size=150, max_cols=4):
     """여러 이미지를 하나의 콜라주로 합성"""
-    images = []
-
-    # 이미지 다운로드
-    for url in image_urls:
-        img = download_image(url)
-        if img:
-            # RGB로 변환 (RGBA인 경우)
-            if img.mode in ('RGBA', 'P'):
-                img = img.convert('RGB')
-            # 썸네일 크기로 리사이즈
-            img.thumbnail((thumb_size, thumb_size), Image.Resampling.LANCZOS)
-            images.append(img)
+    if not image_urls:
+        return None
+
+    # 이미지 병렬 다운로드 (2배 크기까지는 디코더에서 바로 축소)
+    draft_size = (thumb_size * 2, thumb_size * 2)
+    with ThreadPoolExecutor(max_workers=min(len(image_urls), 8)) as executor:
+        raw = list(executor.map(
+            lambda url: download_image(url, draft_size=draft_size), image_urls))
+
+    images = [_prepare_thumbnail(img, thumb_size) for img in raw if img]
 
     if not images:
         return None
 
+    # 흔한 3~4개 케이스는 단일 행 고속 경로로 처리
+    if len(images) in (3, 4) and len(images) <= max_cols:
+        return _collage_single_row(images, thumb_size)
+
     # 그리드 계산
     num_images = len(images)
     cols = min(num_images, max_cols)
     rows = math.ceil(num_images / cols)
 
-    # 캔버스 생성 (흰색 배경)
+    # 캔버스 생성 (흰색 배경) - NumPy 버퍼에 타일을 직접 슬라이스 복사
     canvas_width = cols * thumb_size
     canvas_height = rows * thumb_size
-    collage = Image.new('RGB', (canvas_width, canvas_height), (255, 255, 255))
+    canvas = np.full((canvas_height, canvas_width, 3), 255, dtype=np.uint8)
 
     # 이미지 배치
     for idx, img in enumerate(images):
@@ -94,24 +382,61 @@ def create_image_collage(image_urls, thumb_size=150, max_cols=4):
         x = col * thumb_size + x_offset
         y = row * thumb_size + y_offset
 
-        collage.paste(img, (x, y))
+        arr = np.asarray(img)
+        canvas[y:y + arr.shape[0], x:x + arr.shape[1]] = arr
 
-    return collage
+    return Image.fromarray(canvas, 'RGB')
 
 
-def upload_image_to_host(image):
-    """이미지를 catbox.moe에 업로드하고 URL 반환"""
+def _upload_to_slack(image_bytes, filename='collage.jpg'):
+    """Slack 파일 업로드 API (getUploadURLExternal)로 업로드하고 permalink 반환"""
     try:
-        # 이미지를 바이트로 변환
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='JPEG', quality=85)
-        img_byte_arr.seek(0)
+        auth_header = {'Authorization': f'Bearer {SLACK_BOT_TOKEN}'}
+
+        # 1) 업로드용 pre-signed URL 발급
+        response = _SESSION.post(
+            'https://slack.com/api/files.getUploadURLExternal',
+            headers=auth_header,
+            data={'filename': filename, 'length': len(image_bytes)},
+            timeout=DEFAULT_TIMEOUT
+        )
+        data = response.json()
+        if not data.get('ok'):
+            print(f"    Slack 업로드 URL 발급 실패: {data.get('error')}")
+            return None
+
+        # 2) 이미지 바이트 업로드
+        response = _SESSION.post(data['upload_url'], data=image_bytes, timeout=60)
+        if response.status_code != 200:
+            print(f"    Slack 이미지 업로드 실패: {response.status_code}")
+            return None
+
+        # 3) 업로드 완료 처리 후 permalink 획득
+        response = _SESSION.post(
+            'https://slack.com/api/files.completeUploadExternal',
+            headers=auth_header,
+            json={'files': [{'id': data['file_id'], 'title': filename}]},
+            timeout=DEFAULT_TIMEOUT
+        )
+        complete = response.json()
+        if complete.get('ok') and complete.get('files'):
+            url = complete['files'][0].get('permalink')
+            print(f"    Slack 이미지 업로드 성공: {url}")
+            return url
+        print(f"    Slack 업로드 완료 처리 실패: {complete.get('error')}")
+    except Exception as e:
+        print(f"    Slack 이미지 업로드 오류: {e}")
+
+    return None
 
-        # catbox.moe에 업로드
-        response = requests.post(
+
+def _upload_to_catbox(image_bytes, filename='collage.jpg'):
+    """catbox.moe에 업로드하고 URL 반환 (봇 토큰 없을 때의 폴백)"""
+    try:
+        response = _SESSION.post(
             'https://catbox.moe/user/api.php',
             data={'reqtype': 'fileupload'},
-            files={'fileToUpload': ('collage.jpg', img_byte_arr, 'image/jpeg')},
+            files={'fileToUpload': (filename, io.BytesIO(image_bytes), 'image/jpeg')},
             timeout=60
         )
 
@@ -127,8 +452,47 @@ def upload_image_to_host(image):
     return None
 
 
-def send_slack(title, link, content="", menu_names=None, image_urls=None):
-    """Slack 알림 보내기 (전체 내용 + 메뉴 이미지 콜라주 포함)"""
+def upload_image_to_host(image):
+    """이미지를 업로드하고 URL 반환 (Slack 파일 API 우선, catbox.moe 폴백)"""
+    # 이미지를 바이트로 변환
+    # optimize/progressive + 4:2:0 서브샘플링으로 동일 화질에 페이로드 ~15-30% 절감
+    img_byte_arr = io.BytesIO()
+    image.save(img_byte_arr, format='JPEG', quality=82,
+               optimize=True, progressive=True, subsampling=2)
+    image_bytes = img_byte_arr.getvalue()
+
+    if SLACK_BOT_TOKEN:
+        url = _upload_to_slack(image_bytes)
+        if url:
+            return url
+
+    return _upload_to_catbox(image_bytes)
+
+
+# 푸터 블록 골격 (버튼 URL만 메시지마다 달라짐)
+_FOOTER_BLOCKS_TEMPLATE = (
+    {"type": "divider"},
+    {
+        "type": "actions",
+        "elements": [{
+            "type": "button",
+            "text": {"type": "plain_text", "text": "게시글 보기", "emoji": True},
+            "url": None  # _footer_blocks에서 채움
+        }]
+    },
+)
+
+
+def _footer_blocks(link):
+    """푸터 블록 생성 - 템플릿에서 버튼 URL만 바꿔치기"""
+    divider, actions = _FOOTER_BLOCKS_TEMPLATE
+    button = dict(actions["elements"][0], url=link)
+    return [divider, dict(actions, elements=[button])]
+
+
+def _build_slack_payload(title, link, content="", menu_names=None,
+                         image_urls=None):
+    """Slack 메시지 페이로드 구성 (이미지 다운로드/콜라주/업로드 포함)"""
     if menu_names is None:
         menu_names = []
     if image_urls is None:
@@ -207,25 +571,68 @@ def send_slack(title, link, content="", menu_names=None, image_urls=None):
                     "text": {"type": "mrkdwn", "text": f"_이미지 {num_images}개 (콜라주 생성 실패)_"}
                 })
 
-    payload = {
+    # 원본 게시글 링크 버튼이 담긴 푸터
+    blocks.extend(_footer_blocks(link))
+
+    return {
         "blocks": blocks,
         "text": f"🍽️ {title}"  # fallback text
     }
 
-    response = requests.post(WEBHOOK_URL, json=payload)
-    if response.status_code == 200:
-        print(f"Slack 전송 성공: {title}")
-    else:
-        print(f"Slack 전송 실패: {response.status_code} - {response.text}")
 
+async def send_slack(session, title, link, content="", menu_names=None,
+                     image_urls=None):
+    """Slack 알림 보내기 (전체 내용 + 메뉴 이미지 콜라주 포함)
+
+    이미지 처리(다운로드/합성/업로드)는 블로킹 호출이라 스레드로 넘기고,
+    웹훅 POST만 aiohttp로 비동기 전송한다.
+    """
+    payload = await asyncio.to_thread(
+        _build_slack_payload, title, link, content, menu_names, image_urls)
+
+    # 한글 본문은 UTF-8로 3바이트/자 - gzip으로 전송 바이트 ~3배 절감
+    # orjson은 UTF-8 바이트를 직접 생성 (stdlib json 대비 3~5배 빠름)
+    body = gzip.compress(orjson.dumps(payload))
+    headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+
+    # 웹훅은 초당 1건 제한 - 429는 지수 백오프로 재시도
+    for attempt in range(3):
+        async with session.post(WEBHOOK_URL, data=body, headers=headers,
+                                timeout=aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT)) as response:
+            if response.status == 200:
+                print(f"Slack 전송 성공: {title}")
+                return
+            if response.status == 429:
+                retry_after = float(response.headers.get("Retry-After", 2 ** attempt))
+                print(f"Slack 레이트리밋 - {retry_after}초 후 재시도: {title}")
+                await asyncio.sleep(retry_after)
+                continue
+            body = await response.text()
+            print(f"Slack 전송 실패: {response.status} - {body}")
+            return
+
+    print(f"Slack 전송 실패 (재시도 소진): {title}")
 
-def crawl_post_detail(page, post_id):
-    """게시글 상세 페이지에서 전체 내용과 이미지 크롤링"""
+
+async def crawl_post_detail(page, post_id, cdp=None):
+    """게시글 상세 페이지에서 전체 내용과 이미지 크롤링
+
+    cdp에 페이지의 CDPSession을 주면 Runtime.evaluate를 직접 호출해
+    Playwright 채널 레이어를 우회한다 (세션은 호출자가 페이지당 한 번만
+    열어 게시글 간 재사용). 없으면 일반 page.evaluate 경로로 동작.
+    """
     detail_url = f"https://pf.kakao.com/{CHANNEL_ID}/{post_id}"
     print(f"  상세 페이지 크롤링: {detail_url}")
 
-    page.goto(detail_url)
-    page.wait_for_timeout(3000)
+    await page.goto(detail_url, wait_until="domcontentloaded", timeout=15000)
+
+    # 본문이 렌더링될 때까지만 대기 (고정 3초 sleep 대체)
+    # 헤더/네비의 strong은 셸 렌더링 직후 바로 잡히므로 본문 영역으로 한정
+    try:
+        await page.wait_for_selector(".desc_card, main strong", timeout=15000)
+    except Exception:
+        # 선택자가 불안정한 경우 JS 하이드레이션을 위한 짧은 유예
+        await page.wait_for_timeout(500)
 
     result = {
         "title": "",
@@ -235,81 +642,29 @@ def crawl_post_detail(page, post_id):
     }
 
     try:
-        # 게시글 본문 영역에서 제목과 내용 가져오기
-        post_data = page.evaluate("""() => {
-            // 제외할 키워드 목록 (제목이 아닌 UI 요소들)
-            const excludeKeywords = ['QR', '프로필', '댓글', '소식', '채널홈', '채널',
-                                      '폰으로', '접속해보세요', '고정됨', '공유하기',
-                                      '좋아요', '카카오톡', '더보기', '주식회사', '공식채널'];
-
-            const shouldExclude = (text) => {
-                return excludeKeywords.some(keyword => text.includes(keyword));
-            };
-
-            let title = '';
-            let content = '';
-
-            // 모든 strong 태그에서 제목 찾기 (제외 키워드 없는 첫 번째)
-            const strongs = document.querySelectorAll('strong');
-            for (const strong of strongs) {
-                const text = strong.innerText.trim();
-                if (text && text.length > 1 && !shouldExclude(text)) {
-                    title = text;
-                    break;
-                }
-            }
-
-            // 본문 가져오기 (desc_card 클래스)
-            const descCard = document.querySelector('.desc_card');
-            if (descCard) {
-                content = descCard.innerText.trim();
-            }
+        # 제목/본문/메뉴/이미지를 한 번의 evaluate로 모두 수집 (CDP 왕복 3회 -> 1회)
+        post_data = None
+
+        # 재사용 중인 CDP 세션으로 Runtime.evaluate 직접 호출
+        if cdp is not None:
+            try:
+                evaluated = await cdp.send("Runtime.evaluate", {
+                    # init script 헬퍼가 있으면 재파싱 없이 그대로 사용
+                    "expression": "(window.__extractPost || (" + POST_DETAIL_JS + "))()",
+                    "returnByValue": True,
+                })
+                post_data = evaluated.get("result", {}).get("value")
+            except Exception:
+                post_data = None  # 세션 문제 시 일반 evaluate로 폴백
 
-            return { title, content };
-        }""")
-
-        result["title"] = post_data.get("title", "")
-        result["content"] = post_data.get("content", "")
-
-        # 메뉴 이름들 가져오기 (p 태그에서)
-        menu_names = page.evaluate("""() => {
-            const names = [];
-            const paragraphs = document.querySelectorAll('p');
-
-            for (const p of paragraphs) {
-                const text = p.innerText.trim();
-                // 짧은 메뉴 이름만 (1~10자)
-                if (text && text.length >= 1 && text.length <= 15 &&
-                    !text.includes('채널') && !text.includes('댓글') &&
-                    !text.includes('접속') && !text.includes('폰으로')) {
-                    // 중복 체크
-                    if (!names.includes(text)) {
-                        names.push(text);
-                    }
-                }
-            }
-            return names;
-        }""")
-
-        result["menu_names"] = menu_names
-
-        # 이미지 URL들 가져오기 (중복 제거)
-        image_urls = page.evaluate("""() => {
-            const urls = [];
-            const seenUrls = new Set();
-            const images = document.querySelectorAll('img[alt="이미지"]');
-
-            for (const img of images) {
-                const src = img.src;
-                if (src && !seenUrls.has(src)) {
-                    seenUrls.add(src);
-                    urls.push(src);
-                }
-            }
-            return urls;
-        }""")
+        if post_data is None:
+            post_data = await page.evaluate(
+                "() => window.__extractPost ? window.__extractPost() : null")
+        if post_data is None:
+            # 헬퍼 미등록 컨텍스트 (예: test_single.py)
+            post_data = await page.evaluate(POST_DETAIL_JS)
 
-        result["image_urls"] = image_urls
+        result.update(post_data)
 
     except Exception as e:
         print(f"  상세 크롤링 오류: {e}")
@@ -317,97 +672,132 @@ def crawl_post_detail(page, post_id):
     return result
 
 
-def crawl_latest_posts():
-    """카카오톡 최신 게시글 목록 크롤링 (Playwright 사용)"""
-    posts = []
-
-    with sync_playwright() as p:
-        # Chromium 브라우저 실행 (headless)
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+async def crawl_latest_posts(context):
+    """카카오톡 최신 게시글 목록 크롤링 (공유 브라우저 컨텍스트 사용)"""
+    page = await context.new_page()
 
+    try:
         print(f"페이지 로딩 중: {TARGET_URL}")
-        page.goto(TARGET_URL)
+        await page.goto(TARGET_URL)
 
-        # 페이지 로딩 대기 (게시글이 나타날 때까지)
-        page.wait_for_timeout(3000)
+        # 페이지 로딩 대기 (게시글 링크의 제목까지 렌더링될 때까지)
+        try:
+            await page.wait_for_selector(f'a[href^="/{CHANNEL_ID}/"] strong',
+                                         timeout=15000)
+        except Exception:
+            # 선택자가 불안정한 경우 짧은 유예 후 진행
+            await page.wait_for_timeout(500)
 
-        # 모든 게시글 링크 찾기
+        # 모든 게시글 링크를 한 번의 evaluate로 수집 (링크당 CDP 왕복 제거)
         # URL 패턴: /_FNHuG/{post_id}
-        post_links = page.query_selector_all(f'a[href^="/{CHANNEL_ID}/"]')
-
-        seen_ids = set()
-        for link in post_links:
-            href = link.get_attribute("href")
-            if not href:
-                continue
-
-            # post_id 추출 (예: /_FNHuG/111531719 -> 111531719)
-            parts = href.split("/")
-            if len(parts) >= 3:
-                post_id = parts[2]
-
-                # 숫자인지 확인 (게시글 ID)
-                if post_id.isdigit() and post_id not in seen_ids:
-                    seen_ids.add(post_id)
-
-                    # 제목 찾기 (strong 태그)
-                    title_elem = link.query_selector("strong")
-                    title = title_elem.inner_text() if title_elem else "제목 없음"
-
-                    # 고정 게시글인지 확인
-                    is_pinned = False
-                    try:
-                        parent_text = link.evaluate("el => el.parentElement.innerText")
-                        is_pinned = "고정됨" in parent_text
-                    except:
-                        pass
-
-                    post_link = f"https://pf.kakao.com{href}"
-
-                    posts.append({
-                        "id": post_id,
-                        "title": title,
-                        "link": post_link,
-                        "is_pinned": is_pinned
-                    })
+        raw_posts = await page.evaluate(
+            "(channelId) => window.__extractPosts ? window.__extractPosts(channelId) : null",
+            CHANNEL_ID)
+        if raw_posts is None:
+            raw_posts = await page.evaluate(POST_LIST_JS, CHANNEL_ID)
+
+        # 중복 제거 (같은 게시글이 목록에 여러 번 나타날 수 있음)
+        posts = list({p["id"]: p for p in raw_posts}.values())
+        for post in posts:
+            post["id_int"] = int(post["id"])  # 반복 int() 파싱 방지용 캐시
+            post["link"] = f"https://pf.kakao.com/{CHANNEL_ID}/{post['id']}"
 
         # ID 기준 내림차순 정렬 (최신순)
-        posts.sort(key=lambda x: int(x["id"]), reverse=True)
-
-        browser.close()
+        posts.sort(key=lambda x: x["id_int"], reverse=True)
+    finally:
+        await page.close()
 
     return posts
 
 
-def crawl_and_send_new_posts(new_posts):
-    """새 게시글 상세 크롤링 후 Slack 전송"""
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+async def _block_heavy_resources(route):
+    """이미지/폰트/CSS/미디어와 분석 스크립트 요청 차단
 
-        for post in new_posts:
-            print(f"  - [{post['id']}] {post['title']}")
+    src 속성은 DOM에 그대로 남으므로 이미지 URL 추출에는 영향 없음.
+    """
+    request = route.request
+    if (request.resource_type in BLOCKED_RESOURCE_TYPES or
+            any(host in request.url for host in BLOCKED_HOSTS)):
+        await route.abort()
+    else:
+        await route.continue_()
 
-            # 상세 페이지 크롤링
-            detail = crawl_post_detail(page, post["id"])
 
-            # 디버깅 출력
-            print(f"    제목: {detail.get('title', 'N/A')}")
-            print(f"    본문: {detail.get('content', 'N/A')[:50]}...")
-            print(f"    메뉴: {len(detail.get('menu_names', []))}개")
-            print(f"    이미지: {len(detail.get('image_urls', []))}개")
+async def crawl_new_post_details(context, new_posts):
+    """새 게시글 상세 페이지를 병렬 크롤링 (게시글 순서 유지)
 
-            # Slack 전송
-            send_slack(
-                title=detail.get("title") or post["title"],
-                link=post["link"],
-                content=detail.get("content", ""),
-                menu_names=detail.get("menu_names", []),
-                image_urls=detail.get("image_urls", [])
-            )
+    게시글마다 페이지를 새로 만드는 대신 작은 풀에서 빌려 쓴다.
+    페이지 생성(~50-150ms)과 라우트/init script 재적용이 게시글 수와
+    무관하게 풀 크기만큼만 일어나고, 풀 자체가 동시성 상한이 된다.
+    """
+    if not new_posts:
+        return []
+
+    pool = asyncio.Queue()
+    for _ in range(min(MAX_PARALLEL_PAGES, len(new_posts))):
+        page = await context.new_page()
+        # CDP 세션도 페이지당 한 번만 열어 게시글 간 재사용
+        cdp = await context.new_cdp_session(page)
+        await pool.put((page, cdp))
+
+    async def worker(post):
+        page, cdp = await pool.get()
+        try:
+            return await crawl_post_detail(page, post["id"], cdp=cdp)
+        finally:
+            await pool.put((page, cdp))
 
-        browser.close()
+    try:
+        return await asyncio.gather(*[worker(post) for post in new_posts])
+    finally:
+        while not pool.empty():
+            page, _ = await pool.get()
+            await page.close()
+
+
+def _needs_detail_crawl(post):
+    """상세 크롤링이 필요한 게시글인지 판별
+
+    메뉴 게시글은 이미지/메뉴 목록이, 제목을 못 읽은 게시글은 제목이
+    상세 페이지에만 있다. 그 외 공지류는 목록 데이터만으로 알림 가능.
+    """
+    title = post.get("title", "")
+    return not title or title == "제목 없음" or bool(MENU_TITLE_RE.search(title))
+
+
+async def crawl_and_send_new_posts(context, new_posts):
+    """새 게시글 상세 크롤링 후 Slack 병렬 전송
+
+    상세 페이지가 필요 없는 게시글은 목록 데이터만으로 바로 전송해
+    게시글당 헤드리스 내비게이션 비용을 아낀다.
+    """
+    detail_posts = [p for p in new_posts if _needs_detail_crawl(p)]
+    details = await crawl_new_post_details(context, detail_posts)
+    detail_map = {p["id"]: d for p, d in zip(detail_posts, details)}
+
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_SENDS)
+
+    async with aiohttp.ClientSession() as session:
+        async def sender(post, detail):
+            async with semaphore:
+                # 디버깅 출력
+                print(f"  - [{post['id']}] {post['title']}")
+                print(f"    제목: {detail.get('title', 'N/A')}")
+                print(f"    본문: {detail.get('content', 'N/A')[:50]}...")
+                print(f"    메뉴: {len(detail.get('menu_names', []))}개")
+                print(f"    이미지: {len(detail.get('image_urls', []))}개")
+
+                await send_slack(
+                    session,
+                    title=detail.get("title") or post["title"],
+                    link=post["link"],
+                    content=detail.get("content", ""),
+                    menu_names=detail.get("menu_names", []),
+                    image_urls=detail.get("image_urls", [])
+                )
+
+        await asyncio.gather(*[
+            sender(post, detail_map.get(post["id"], {})) for post in new_posts])
 
 
 def get_latest_non_pinned_post(posts):
@@ -419,11 +809,7 @@ def get_latest_non_pinned_post(posts):
     return posts[0] if posts else None
 
 
-def main():
-    if not WEBHOOK_URL:
-        print("ERROR: SLACK_WEBHOOK_URL 환경변수가 설정되지 않았습니다.")
-        sys.exit(1)
-
+async def main_async():
     print("=" * 50)
     print("카카오톡 채널 크롤러 시작")
     print(f"대상: {TARGET_URL}")
@@ -433,46 +819,96 @@ def main():
     last_post_id = load_last_post()
     print(f"마지막 확인 게시글 ID: {last_post_id or '없음 (최초 실행)'}")
 
-    # 크롤링 실행
-    posts = crawl_latest_posts()
-
-    if not posts:
-        print("게시글을 찾을 수 없습니다.")
-        return
-
-    print(f"총 {len(posts)}개의 게시글 발견")
-
-    # 새 게시글 필터링 (마지막 ID보다 큰 것들)
-    new_posts = []
+    # 프리체크: 조건부 GET 한 번으로 ETag와 게시글 ID를 모두 확인
+    new_etag = None
     if last_post_id:
-        last_id_num = int(last_post_id)
-        new_posts = [p for p in posts if int(p["id"]) > last_id_num]
-    else:
-        # 최초 실행: 가장 최신 1개만
-        latest = get_latest_non_pinned_post(posts)
-        if latest:
-            new_posts = [latest]
+        unchanged, http_ids, new_etag = precheck_listing()
+        if unchanged:
+            print("변경 없음 (ETag 일치) - 크롤링 생략")
+            return
+        if http_ids and max(int(i) for i in http_ids) <= int(last_post_id):
+            print("새 게시글 없음 (HTTP 프리체크) - 브라우저 기동 생략")
+            # 전송할 것이 없으므로 지금 ETag를 저장해도 안전
+            if new_etag:
+                save_last_etag(new_etag)
+            return
+
+    # 브라우저는 한 번만 기동해 목록/상세 크롤링이 공유
+    # 영속 프로필로 DNS/TLS 상태를 크론 실행 간 재사용 (핸드셰이크 절감)
+    async with async_playwright() as p:
+        # 단발성 크롤링에는 서비스 워커 캐시가 무용 - 차단해 콜드 로드 단축
+        context = await p.chromium.launch_persistent_context(
+            user_data_dir=PROFILE_DIR,
+            headless=True,
+            args=BROWSER_ARGS,
+            service_workers="block",
+            bypass_csp=True,
+            viewport={"width": 1280, "height": 2000},
+            user_agent=USER_AGENT,
+        )
 
-    if not new_posts:
-        print("새 게시글이 없습니다.")
-        return
+        try:
+            # 무거운 리소스 차단으로 페이지 로드 대역폭/시간 절감
+            await context.route("**/*", _block_heavy_resources)
+
+            # 추출 헬퍼를 컨텍스트에 한 번만 등록 (페이지 로드마다 자동 주입)
+            await context.add_init_script(EXTRACT_HELPERS_JS)
 
-    print(f"새 게시글 {len(new_posts)}개 발견!")
+            # 크롤링 실행
+            posts = await crawl_latest_posts(context)
 
-    # 오래된 것부터 알림 (시간순)
-    new_posts.sort(key=lambda x: int(x["id"]))
+            if not posts:
+                print("게시글을 찾을 수 없습니다.")
+                return
 
-    # 상세 크롤링 및 Slack 전송
-    crawl_and_send_new_posts(new_posts)
+            print(f"총 {len(posts)}개의 게시글 발견")
 
-    # 가장 최신 ID 저장
-    latest_id = max(int(p["id"]) for p in posts)
+            # 새 게시글 필터링 (마지막 ID보다 큰 것들)
+            new_posts = []
+            if last_post_id:
+                last_id_num = int(last_post_id)
+                new_posts = [p for p in posts if p["id_int"] > last_id_num]
+            else:
+                # 최초 실행: 가장 최신 1개만
+                latest = get_latest_non_pinned_post(posts)
+                if latest:
+                    new_posts = [latest]
+
+            if not new_posts:
+                print("새 게시글이 없습니다.")
+                if new_etag:
+                    save_last_etag(new_etag)
+                return
+
+            print(f"새 게시글 {len(new_posts)}개 발견!")
+
+            # 오래된 것부터 알림 (시간순)
+            new_posts.sort(key=lambda x: x["id_int"])
+
+            # 상세 크롤링 및 Slack 전송
+            await crawl_and_send_new_posts(context, new_posts)
+        finally:
+            # 프로필(DNS/TLS 상태)이 디스크에 반영되도록 항상 정상 종료
+            await context.close()
+
+    # 가장 최신 ID 저장 (전송까지 성공한 뒤에만 ETag도 함께 저장)
+    latest_id = max(p["id_int"] for p in posts)
     save_last_post(str(latest_id))
+    if new_etag:
+        save_last_etag(new_etag)
     print(f"최신 게시글 ID 저장: {latest_id}")
 
     print("=" * 50)
     print("크롤링 완료!")
 
 
+def main():
+    if not WEBHOOK_URL:
+        print("ERROR: SLACK_WEBHOOK_URL 환경변수가 설정되지 않았습니다.")
+        sys.exit(1)
+
+    asyncio.run(main_async())
+
+
 if __name__ == "__main__":
     main()
@@ -13,16 +13,22 @@
 
 import sys
 import re
+import asyncio
 sys.stdout.reconfigure(encoding='utf-8')
 
+import aiohttp
 from crawler import crawl_post_detail, send_slack, save_last_post
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
+
+
+# URL 끝의 게시글 ID 패턴 (모듈 로드 시 1회 컴파일)
+_POST_ID_RE = re.compile(r'/(\d+)$')
 
 
 def parse_post_id(arg):
     """POST_ID 또는 URL에서 ID 추출"""
     # URL인 경우: https://pf.kakao.com/_FNHuG/111555915
-    match = re.search(r'/(\d+)$', arg)
+    match = _POST_ID_RE.search(arg)
     if match:
         return match.group(1)
     # 숫자만 입력한 경우
@@ -49,34 +55,43 @@ def main():
     print(f"수동 전송: {POST_URL}")
     print("=" * 50)
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+    async def crawl():
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            page = await browser.new_page()
 
-        # 상세 크롤링
-        detail = crawl_post_detail(page, POST_ID)
+            # 상세 크롤링
+            detail = await crawl_post_detail(page, POST_ID)
+            await browser.close()
+            return detail
 
-        print(f"\n[크롤링 결과]")
-        print(f"  제목: {detail.get('title', 'N/A')}")
-        print(f"  본문: {detail.get('content', 'N/A')[:100]}...")
-        print(f"  메뉴: {len(detail.get('menu_names', []))}개")
-        print(f"  이미지: {len(detail.get('image_urls', []))}개")
+    detail = asyncio.run(crawl())
 
-        if detail.get('image_urls'):
-            for i, url in enumerate(detail['image_urls']):
-                print(f"    [{i+1}] {url[:80]}...")
+    print(f"\n[크롤링 결과]")
+    print(f"  제목: {detail.get('title', 'N/A')}")
+    print(f"  본문: {detail.get('content', 'N/A')[:100]}...")
+    print(f"  메뉴: {len(detail.get('menu_names', []))}개")
+    print(f"  이미지: {len(detail.get('image_urls', []))}개")
 
-        browser.close()
+    if detail.get('image_urls'):
+        for i, url in enumerate(detail['image_urls']):
+            print(f"    [{i+1}] {url[:80]}...")
 
     # Slack 전송
     print(f"\n[Slack 전송 중...]")
-    send_slack(
-        title=detail.get("title") or "새 게시글",
-        link=POST_URL,
-        content=detail.get("content", ""),
-        menu_names=detail.get("menu_names", []),
-        image_urls=detail.get("image_urls", [])
-    )
+
+    async def send():
+        async with aiohttp.ClientSession() as session:
+            await send_slack(
+                session,
+                title=detail.get("title") or "새 게시글",
+                link=POST_URL,
+                content=detail.get("content", ""),
+                menu_names=detail.get("menu_names", []),
+                image_urls=detail.get("image_urls", [])
+            )
+
+    asyncio.run(send())
 
     # last_post.txt 업데이트
     save_last_post(POST_ID)